@@ -1,46 +1,54 @@
-import app as ap
+import numpy as np
 import pandas as pd
 import streamlit as st
-import pydeck as pdk
-import seaborn as sns
-import matplotlib.pyplot as plt
 import plotly.express as px
 
 st.set_page_config(page_title="Análisis Olímpico Interactivo", layout="wide")
 
+# Columnas que necesitan los gráficos del dashboard
+PLOT_COLUMNS = ['year', 'gender', 'age', 'discipline_grouped', 'noc', 'medal']
+
 # Cargar datos
 @st.cache_data
 def load_data():
-    df = pd.read_csv("jjoo.csv", parse_dates=['born_date'])
+    # Snapshot con los tipos ya preparados (categorías, numéricos pequeños):
+    # se genera con scripts/build_feather_snapshot.py
+    df = pd.read_feather("jjoo.feather")
     return df
 
-df = load_data()
+@st.cache_data
+def unique_nocs(game_type):
+    """NOCs (ordenados) que han participado en un tipo de Juegos; no cambia entre ejecuciones."""
+    df = load_data()
+    return tuple(sorted(df.loc[df['type'] == game_type, 'noc'].dropna().unique()))
 
-# Separar por tipo de Juegos
-df_summer = df[df['type'] == 'Summer']
-df_winter = df[df['type'] == 'Winter']
+df = load_data()
 
 # Sidebar: Filtros interactivos
+# Las condiciones se acumulan en una única máscara booleana y el DataFrame se indexa una sola vez
 st.sidebar.header("Filtros")
 tipo_juego = st.sidebar.radio("Tipo de Juegos", ["Verano", "Invierno"])
-df_tipo = df_summer if tipo_juego == 'Verano' else df_winter
+tipo = 'Summer' if tipo_juego == 'Verano' else 'Winter'
+mask = df['type'].values == tipo
 
 # Filtro de país
-paises = df_tipo['noc'].unique()
-paises.sort()
+paises = unique_nocs(tipo)
 pais = st.sidebar.selectbox("País (NOC)", options=['Todos'] + list(paises))
 if pais != 'Todos':
-    df_tipo = df_tipo[df_tipo['noc'] == pais]
+    mask &= df['noc'].values == pais
 
 # Filtro de medalla
 medalla = st.sidebar.selectbox("Tipo de medalla", options=['Todas', 'Gold', 'Silver', 'Bronze'])
 if medalla != 'Todas':
-    df_tipo = df_tipo[df_tipo['medal'] == medalla]
+    mask &= df['medal'].values == medalla
 
 # Filtro de género
 genero = st.sidebar.selectbox("Género", options=['Ambos', 'M', 'F'])
 if genero != 'Ambos':
-    df_tipo = df_tipo[df_tipo['gender'] == genero]
+    mask &= df['gender'].values == genero
+
+# Solo se materializan las columnas que usan los gráficos
+df_tipo = df.loc[mask, PLOT_COLUMNS]
 
 # ============ VISUALIZACIONES ============
 
@@ -48,25 +56,30 @@ st.title(f"Juegos Olímpicos de {tipo_juego} - Dashboard Interactivo")
 
 # --- Gráfico 1: Evolución histórica por género ---
 st.subheader("📊 Evolución histórica por género")
-fig1, ax1 = plt.subplots(figsize=(12, 5))
-sns.countplot(data=df_tipo, x='year', hue='gender', palette='Set2', ax=ax1)
-plt.xticks(rotation=45)
-st.pyplot(fig1)
+# Se agrega antes de dibujar: el gráfico recibe ~años x géneros filas en lugar de todas las del filtro
+counts = df_tipo.groupby(['year', 'gender'], sort=False, observed=True).size().reset_index(name='n')
+fig1 = px.bar(counts, x='year', y='n', color='gender', barmode='group',
+              labels={'year': 'Año', 'n': 'Participantes', 'gender': 'Género'},
+              color_discrete_sequence=px.colors.qualitative.Set2)
+st.plotly_chart(fig1, use_container_width=True)
 
 # --- Gráfico 2: Edad por disciplina (boxplot) ---
 st.subheader("📦 Boxplot: Edad por disciplina")
-fig2, ax2 = plt.subplots(figsize=(12, 6))
-sns.boxplot(data=df_tipo, x='discipline_grouped', y='age', hue='gender', palette='coolwarm', ax=ax2)
-ax2.set_xticklabels(ax2.get_xticklabels(), rotation=45)
-st.pyplot(fig2)
+# Una distribución no se puede agregar, pero una muestra de 20.000 filas conserva su forma
+df_box = df_tipo.sample(n=min(len(df_tipo), 20000), random_state=0)
+fig2 = px.box(df_box, x='discipline_grouped', y='age', color='gender',
+              labels={'discipline_grouped': 'Disciplina', 'age': 'Edad', 'gender': 'Género'})
+st.plotly_chart(fig2, use_container_width=True)
 
 # --- Gráfico 3: Conteo de medallas por país ---
 st.subheader("🥇 Conteo de Medallas por País")
-medallas_pais = df_tipo[df_tipo['medal'].isin(['Gold', 'Silver', 'Bronze'])].groupby('noc')['medal'].count().sort_values(ascending=False).head(15)
-fig3, ax3 = plt.subplots(figsize=(10, 5))
-medallas_pais.plot(kind='bar', color='gold', ax=ax3)
-ax3.set_ylabel("Cantidad de Medallas")
-st.pyplot(fig3)
+medallas_pais = df_tipo.loc[df_tipo['medal'].isin(['Gold', 'Silver', 'Bronze']), 'noc'].value_counts().head(15)
+# value_counts de una columna categórica incluye los NOC sin medallas (0): no se muestran
+medallas_pais = medallas_pais[medallas_pais > 0]
+fig3 = px.bar(medallas_pais.reset_index(), x='noc', y='count',
+              labels={'noc': 'País (NOC)', 'count': 'Cantidad de Medallas'},
+              color_discrete_sequence=['gold'])
+st.plotly_chart(fig3, use_container_width=True)
 
 # --- Gráfico 4: Mapa (opcional) ---
 # st.subheader("🌍 Mapa interactivo por país (requiere coordenadas)")
@@ -90,24 +103,39 @@ st.title("🌍 Mapa Interactivo de Participación Olímpica")
 st.markdown("Visualiza países y capitales junto con sus datos olímpicos (medallas, participantes, etc.).")
 
 @st.cache_data
-def load_data():
-    geo = pd.read_csv("geolocalizacion_completa.csv")
-    jjoo = pd.read_csv("jjoo.csv")
-    df_join = jjoo.merge(geo, left_on="noc", right_on="noc", how="left")
-    return df_join
+def load_geodata():
+    geo = pd.read_parquet("geo.parquet", engine='pyarrow')
+    # El fichero repite algunas filas idénticas: una sola fila por NOC
+    geo = geo.drop_duplicates(subset='noc')
+    # Misma categoría de 'noc' que df: el merge compara códigos enteros, no strings
+    # (los NOC de geo sin atletas quedan como NaN y no se cruzan con nada)
+    geo['noc'] = geo['noc'].astype(load_data()['noc'].dtype)
+    return geo
 
-df_join = load_data()
+geo = load_geodata()
 
 # Filtro por tipo de medalla
 medalla_seleccionada = st.selectbox("Filtrar por medalla", ["Todas", "Gold", "Silver", "Bronze"])
+df_medallas = df
 if medalla_seleccionada != "Todas":
-    df_join = df_join[df_join['medal'].str.lower() == medalla_seleccionada.lower()]
+    df_medallas = df_medallas[df_medallas['medal'] == medalla_seleccionada]
+
+# El mapa solo necesita un punto por NOC: se agrega primero y luego se unen las coordenadas
+noc_agg = (df_medallas['medal'].isin(['Gold', 'Silver', 'Bronze'])
+           .groupby(df_medallas['noc'], sort=False, observed=True).sum()
+           .rename('medals').reset_index())
+df_join = noc_agg.merge(geo, on='noc', how='left').dropna(subset=['latitude', 'longitude'])
+# Radio del punto según las medallas del NOC (raíz cuadrada: los países con miles de medallas no tapan el mapa)
+df_join['radius'] = 100000 + 20000 * np.sqrt(df_join['medals'])
 
 # Mostrar tabla si se desea
 if st.checkbox("Mostrar tabla de datos combinados"):
     st.dataframe(df_join)
 
 # Mapa interactivo
+# pydeck solo lo usa el mapa: se importa aquí y no al arrancar el script
+import pydeck as pdk
+
 st.subheader("🗺️ Mapa de países participantes")
 st.pydeck_chart(pdk.Deck(
     map_style="mapbox://styles/mapbox/light-v9",
@@ -120,12 +148,12 @@ st.pydeck_chart(pdk.Deck(
     layers=[
         pdk.Layer(
             "ScatterplotLayer",
-            data=df_join.dropna(subset=['latitude', 'longitude']),
+            data=df_join,
             get_position='[longitude, latitude]',
             get_color='[200, 30, 0, 160]',
-            get_radius=300000,
+            get_radius='radius',
             pickable=True
         )
     ],
-    tooltip={"text": "{País}\n{Capital}\nMedalla: {medal}"}
+    tooltip={"text": "{country}\n{capital}\nMedallas: {medals}"}
 ))
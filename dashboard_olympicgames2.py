@@ -1,8 +1,6 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -14,15 +12,18 @@ st.set_page_config(
 
 # --- Data Loading Functions ---
 
+# Columns read from 'jjoo.parquet' (generated by scripts/convert_to_parquet.py)
+MAIN_COLUMNS = ['year', 'type', 'noc', 'medal', 'age', 'gender', 'discipline', 'discipline_grouped',
+                'name', 'height_cm', 'weight_kg', 'born_date']
+# Low-cardinality text columns, loaded as 'category' (groupby/isin work on integer codes)
+CATEGORY_COLUMNS = ['noc', 'type', 'medal', 'gender', 'discipline', 'discipline_grouped']
+
+
 @st.cache_data  # Caches the result to improve performance
-def load_data(filepath='jjoo.csv'):
-    """Loads the preprocessed CSV file 'jjoo.csv'."""
+def load_data(filepath='jjoo.parquet'):
+    """Loads the preprocessed Parquet file 'jjoo.parquet' (only the columns the dashboard uses)."""
     try:
-        df = pd.read_csv(filepath)
-        # Optional: Convert columns if not loaded with the correct type
-        # df['born_date'] = pd.to_datetime(df['born_date'], errors='coerce')
-        # df['year'] = pd.to_numeric(df['year'], errors='coerce')
-        # ... etc ...
+        df = pd.read_parquet(filepath, columns=MAIN_COLUMNS, engine='pyarrow')
 
         # Verify essential columns (adjust as needed)
         essential_cols = ['year', 'type', 'noc', 'medal', 'age', 'gender', 'discipline_grouped', 'name', 'discipline']
@@ -31,6 +32,14 @@ def load_data(filepath='jjoo.csv'):
             st.error(f"Missing essential columns in '{filepath}': {', '.join(missing_cols)}")
             return pd.DataFrame()
 
+        for col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype('category')
+        # Smaller numeric dtypes: year fits in int16, age in int8, height/weight in float32
+        df['year'] = df['year'].astype('int16')
+        df['age'] = pd.to_numeric(df['age'], downcast='integer')
+        df['height_cm'] = df['height_cm'].astype('float32')
+        df['weight_kg'] = df['weight_kg'].astype('float32')
+
         st.success(f"File '{filepath}' loaded successfully ({len(df):,} rows).")
         return df
     except FileNotFoundError:
@@ -42,18 +51,26 @@ def load_data(filepath='jjoo.csv'):
 
 
 @st.cache_data
-def load_noc_coords(filepath='noc_coordinates.csv'):
-    """Loads NOC coordinates and country name data."""
+def load_noc_coords(filepath='noc_coords.parquet', noc_categories=None):
+    """Loads NOC coordinates and country name data.
+
+    Pass the main DataFrame's 'noc' categories as noc_categories so both frames share the same
+    categorical dtype and merges on 'noc' compare integer codes (NOCs without athletes are dropped).
+    """
     try:
-        df_coords = pd.read_csv(filepath)
+        df_coords = pd.read_parquet(filepath, engine='pyarrow')
         # Verify required columns
         if 'noc' not in df_coords.columns or 'country' not in df_coords.columns or \
            'latitude' not in df_coords.columns or 'longitude' not in df_coords.columns:
             st.error(f"The file '{filepath}' must contain the columns 'noc', 'country', 'latitude', 'longitude'.")
             return pd.DataFrame(columns=['noc', 'country', 'latitude', 'longitude'])
         
+        df_coords['noc'] = df_coords['noc'].astype(pd.CategoricalDtype(noc_categories))
         # Ensure no NaNs in key columns
         df_coords.dropna(subset=['noc', 'country', 'latitude', 'longitude'], inplace=True)
+        # The file repeats some identical rows: keep one row per NOC so it can serve as a lookup index
+        df_coords.drop_duplicates(subset='noc', inplace=True)
+        df_coords['country'] = df_coords['country'].astype('category')
         return df_coords[['noc', 'country', 'latitude', 'longitude']]
     except FileNotFoundError:
         st.error(f"File '{filepath}' not found. Make sure it is in the correct path.")
@@ -62,17 +79,61 @@ def load_noc_coords(filepath='noc_coordinates.csv'):
         st.error(f"Error loading or processing '{filepath}': {e}")
         return pd.DataFrame(columns=['noc', 'country', 'latitude', 'longitude'])
 
+
+# --- Filtering and Cached Aggregations ---
+
+def filter_olympics(df, years, game_type, genders):
+    """Applies the global sidebar filters (year range, game type, genders) to the main DataFrame."""
+    # All conditions go into a single query expression, so the frame is filtered (and copied) once;
+    # pandas evaluates it with numexpr when that package is installed
+    year_min, year_max = years
+    conditions = ['@year_min <= year <= @year_max']
+    if game_type != 'All' and 'type' in df.columns:
+        conditions.append('type == @game_type')
+
+    if genders and 'gender' in df.columns:
+        conditions.append('gender in @genders')
+    return df.query(' and '.join(conditions))
+
+
+# The aggregations below are cached on the filter values only: the main DataFrame is passed
+# as '_df' so Streamlit does not hash it (it never changes after load_data).
+@st.cache_data
+def compute_participation_by_year_gender(_df, years, game_type, genders):
+    """Number of participants per year and gender for the given filters."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    # Keep sort=True here: px.area draws each trace in row order, so years must be ascending
+    return df_filtered.groupby(['year', 'gender'], observed=True).size().reset_index(name='Count')
+
+
+@st.cache_data
+def compute_metrics_by_noc(_df, years, game_type, genders):
+    """Athlete and medal counts per NOC for the given filters."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    # Count specific medals in a single vectorized pass (ensure strings match your dataset)
+    medal_counts = pd.crosstab(df_filtered['noc'], df_filtered['medal']).reindex(
+        columns=['Gold', 'Silver', 'Bronze'], fill_value=0
+    )
+    metrics_by_noc = df_filtered.groupby('noc', sort=False, observed=True).agg(
+        Total_Athletes=('name', 'nunique'),
+    )
+    # Any medal counts ('No Medal' rows are excluded by the reindex above)
+    metrics_by_noc['Total_Medals'] = medal_counts.sum(axis=1)
+    return metrics_by_noc.join(medal_counts).reset_index()
+
+
 # --- Load Data ---
 df_olympics = load_data()
-df_coords = load_noc_coords()
 
 # --- Sidebar for Global Filters ---
 st.sidebar.header("Global Filters 🌍")
 
 if df_olympics.empty:
-    st.sidebar.error("Main data file ('jjoo.csv') could not be loaded. The app cannot proceed.")
+    st.sidebar.error("Main data file ('jjoo.parquet') could not be loaded. The app cannot proceed.")
     st.stop()  # Stop execution if no data is loaded
 
+df_coords = load_noc_coords(noc_categories=tuple(df_olympics['noc'].cat.categories))
+
 # --- Filters ---
 # Ensure 'year' is numeric before using min/max
 if pd.api.types.is_numeric_dtype(df_olympics['year']):
@@ -115,15 +176,9 @@ else:
     selected_gender = []
 
 # --- Filter the Main DataFrame ---
-df_filtered = df_olympics[
-    (df_olympics['year'] >= selected_years[0]) &
-    (df_olympics['year'] <= selected_years[1])
-]
-if selected_type != 'All' and 'type' in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered['type'] == selected_type]
-
-if selected_gender and 'gender' in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered['gender'].isin(selected_gender)]
+# Hashable filter values, used as cache keys by the compute_* functions
+filter_key = (tuple(selected_years), selected_type, tuple(selected_gender))
+df_filtered = filter_olympics(df_olympics, *filter_key)
 
 # --- Check if any data remains after filtering ---
 if df_filtered.empty and not df_olympics.empty:
@@ -162,7 +217,7 @@ with tab_overview:
 
     st.markdown("### Participation Over Time by Gender")
     if 'year' in df_filtered.columns and 'gender' in df_filtered.columns:
-        participation_over_time = df_filtered.groupby(['year', 'gender']).size().reset_index(name='Count')
+        participation_over_time = compute_participation_by_year_gender(df_olympics, *filter_key)
         fig_participation = px.area(participation_over_time, x='year', y='Count', color='gender',
                                     labels={'year': 'Year', 'Count': 'Number of Participants', 'gender': 'Gender'},
                                     markers=True, template='plotly_white')
@@ -173,7 +228,7 @@ with tab_overview:
 
     st.markdown("### Number of Disciplines per Year")
     if 'year' in df_filtered.columns and 'discipline' in df_filtered.columns:
-        # Use 'discipline' to count unique disciplines
+        # Use 'discipline' to count unique disciplines (sorted years: px.line follows row order)
         disciplines_over_time = df_filtered.groupby('year')['discipline'].nunique().reset_index()
         fig_disciplines = px.line(disciplines_over_time, x='year', y='discipline',
                                 title="Number of Olympic Disciplines Over Time",
@@ -188,19 +243,7 @@ with tab_geo:
     st.header("Performance and Participation by Country (NOC)")
 
     # Calculate metrics per NOC (using 'noc', 'name', 'medal')
-    # Ensure 'medal' doesn't contain only NaNs or unexpected values
-    df_filtered['medal_present'] = df_filtered['medal'].notna() & (df_filtered['medal'] != 'No Medal')  # Adjust if using a different placeholder
-
-    metrics_by_noc = df_filtered.groupby('noc').agg(
-        Total_Athletes=('name', 'nunique'),
-        Total_Medals=('medal_present', 'sum'),  # Sum of True (1) where medals exist
-        # Count specific medals (ensure strings match your dataset)
-        Gold=('medal', lambda x: (x == 'Gold').sum()),
-        Silver=('medal', lambda x: (x == 'Silver').sum()),
-        Bronze=('medal', lambda x: (x == 'Bronze').sum())
-    ).reset_index()
-    # Convert Total_Medals to int
-    metrics_by_noc['Total_Medals'] = metrics_by_noc['Total_Medals'].astype(int)
+    metrics_by_noc = compute_metrics_by_noc(df_olympics, *filter_key)
     # Add option to sort countries
     sort_options = ['Total_Medals', 'Total_Athletes', 'Gold', 'Silver', 'Bronze']
     valid_sort_options = [opt for opt in sort_options if opt in metrics_by_noc.columns]  # Only valid options
@@ -226,8 +269,12 @@ with tab_geo:
     st.markdown("### Geographic Distribution of Medals")
     if not df_coords.empty and 'noc' in metrics_by_noc.columns:
         # Merge metrics with coordinates using 'noc'
-        df_map_data = pd.merge(metrics_by_noc[metrics_by_noc['Total_Medals'] > 0], df_coords, on='noc', how='left')
-        df_map_data.dropna(subset=['latitude', 'longitude'], inplace=True)
+        # One coordinate row per NOC: an index-aligned join is a plain lookup, no need for pd.merge
+        coords_by_noc = df_coords.set_index('noc')
+        medal_nocs = metrics_by_noc[metrics_by_noc['Total_Medals'] > 0].set_index('noc')
+        df_map_data = (medal_nocs.join(coords_by_noc, how='left')
+                       .dropna(subset=['latitude', 'longitude'])
+                       .reset_index())
 
         if not df_map_data.empty:
             fig_scatter_map = px.scatter_mapbox(
@@ -253,7 +300,7 @@ with tab_geo:
         else:
             st.warning("Could not merge medal data with coordinates for the map.")
     else:
-        st.warning("Coordinate data ('noc_coordinates.csv') not loaded or 'noc' column not found for map creation.")
+        st.warning("Coordinate data ('noc_coords.parquet') not loaded or 'noc' column not found for map creation.")
 # --- TAB 3: ATHLETE ANALYSIS ---
 with tab_athletes:
     st.header("Physical and Demographic Characteristics of Athletes")
@@ -380,8 +427,11 @@ with tab_disciplines:
             if not df_disciplines_filtered.empty and 'name' in df_disciplines_filtered.columns:
                 # Count unique athletes ('name')
                 participation_counts = df_disciplines_filtered.groupby(
-                    ['discipline_grouped', 'discipline']
+                    ['discipline_grouped', 'discipline'], sort=False, observed=True
                 )['name'].nunique().reset_index(name='Athlete Count')
+                # px.treemap regroups the path columns itself: plain strings keep it from
+                # expanding every (unused) category combination into empty nodes
+                participation_counts = participation_counts.astype({'discipline_grouped': str, 'discipline': str})
 
                 fig_treemap = px.treemap(
                     participation_counts,
@@ -403,13 +453,11 @@ with tab_disciplines:
         # Use 'age' and 'discipline'
         if 'age' in df_filtered.columns and pd.api.types.is_numeric_dtype(df_filtered['age']) and 'discipline' in df_filtered.columns:
             # Calculate average age per discipline (Top N by number of athletes)
-            athletes_per_discipline = df_filtered.groupby('discipline')['name'].nunique().reset_index(name='athlete_count')
-            top_disciplines_by_athletes = athletes_per_discipline.nlargest(20, 'athlete_count')['discipline'].tolist()
-
-            # Filter main DataFrame for these disciplines and calculate average age
-            age_by_discipline = df_filtered[
-                df_filtered['discipline'].isin(top_disciplines_by_athletes)
-            ].groupby('discipline')['age'].mean().reset_index().sort_values('age', ascending=False)
+            # A single groupby computes both metrics; the Top 20 is then picked on athlete_count
+            age_by_discipline = df_filtered.groupby('discipline', sort=False, observed=True).agg(
+                athlete_count=('name', 'nunique'),
+                age=('age', 'mean')
+            ).nlargest(20, 'athlete_count').sort_values('age', ascending=False).reset_index()
 
             fig_age_discipline = px.bar(
                 age_by_discipline, x='discipline', y='age',
@@ -14,11 +14,21 @@ st.set_page_config(
 
 # --- Funciones de Carga de Datos ---
 
+# Columnas de 'jjoo.csv' que usa el dashboard (el resto no se llega a leer)
+MAIN_COLUMNS = ['year', 'type', 'noc', 'medal', 'age', 'gender', 'discipline_grouped', 'name', 'discipline',
+                'height_cm', 'weight_kg']
+# Columnas de texto con pocos valores distintos: se cargan como 'category' (groupby/isin/== trabajan con códigos enteros).
+# Convención: todo groupby pasa observed=True, para que solo aparezcan las categorías presentes en los datos
+# filtrados y no el producto cartesiano de todas (con grupos vacíos)
+CATEGORY_COLUMNS = ['type', 'noc', 'medal', 'gender', 'discipline', 'discipline_grouped']
+
+
 @st.cache_data # Cachea el resultado para mejorar rendimiento
 def load_data(filepath='jjoo.csv'):
-    """Carga el archivo CSV pre-procesado 'jjoo.csv'."""
+    """Carga el archivo CSV pre-procesado 'jjoo.csv' (solo las columnas que usa el dashboard)."""
     try:
-        df = pd.read_csv(filepath)
+        # El lector de pyarrow parsea el CSV en varios hilos
+        df = pd.read_csv(filepath, engine='pyarrow', usecols=MAIN_COLUMNS)
         # Opcional: Convertir columnas si no se cargan con el tipo correcto
         # df['born_date'] = pd.to_datetime(df['born_date'], errors='coerce')
         # df['year'] = pd.to_numeric(df['year'], errors='coerce')
@@ -31,6 +41,17 @@ def load_data(filepath='jjoo.csv'):
             st.error(f"Faltan columnas esenciales en '{filepath}': {', '.join(missing_cols)}")
             return pd.DataFrame()
 
+        for col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype('category')
+        # Cada atleta aparece en varias filas (una por prueba): como 'category', los nunique de atletas
+        # de las agregaciones cuentan códigos enteros en lugar de hashear strings
+        df['name'] = df['name'].astype('category')
+        # Tipos numéricos pequeños: year cabe en int16, age en int8 y altura/peso en float32
+        df['year'] = df['year'].astype('int16')
+        df['age'] = pd.to_numeric(df['age'], downcast='integer')
+        df['height_cm'] = df['height_cm'].astype('float32')
+        df['weight_kg'] = df['weight_kg'].astype('float32')
+
         st.success(f"Archivo '{filepath}' cargado correctamente ({len(df):,} filas).")
         return df
     except FileNotFoundError:
@@ -42,17 +63,22 @@ def load_data(filepath='jjoo.csv'):
 
 
 @st.cache_data
-def load_noc_coords(filepath='noc_coordinates.csv'):
-    """Carga los datos de coordenadas NOC y el nombre del país."""
+def load_noc_coords(filepath='noc_coordinates.csv', noc_categories=None):
+    """Carga los datos de coordenadas NOC y el nombre del país.
+
+    Pasar las categorías de 'noc' del DataFrame principal como noc_categories para que los dos compartan
+    el mismo dtype categórico y el merge por 'noc' compare códigos enteros (los NOC sin atletas se descartan).
+    """
+    cols = ['noc', 'country', 'latitude', 'longitude']
     try:
-        df_coords = pd.read_csv(filepath)
-        # Verificar columnas requeridas
-        if 'noc' not in df_coords.columns or 'country' not in df_coords.columns or 'latitude' not in df_coords.columns or 'longitude' not in df_coords.columns:
-            st.error(f"El archivo '{filepath}' debe contener columnas 'noc', 'country', 'latitude', 'longitude'.")
-            return pd.DataFrame(columns=['noc', 'country', 'latitude', 'longitude'])
-        # Asegurar que no haya NaNs en columnas clave
-        df_coords.dropna(subset=['noc', 'country', 'latitude', 'longitude'], inplace=True)
-        return df_coords[['noc', 'country', 'latitude', 'longitude']]
+        # Solo las columnas requeridas (si falta alguna, read_csv lanza un error que se muestra abajo)
+        df_coords = pd.read_csv(filepath, engine='pyarrow', usecols=cols,
+                                dtype={'noc': 'category', 'country': 'category'})
+        df_coords['noc'] = df_coords['noc'].astype(pd.CategoricalDtype(noc_categories))
+        # Una sola selección de filas: sin NaNs en columnas clave y una fila por NOC
+        # (el fichero repite algunas filas idénticas, que duplicarían puntos en el mapa)
+        mask = df_coords[cols].notna().all(axis=1) & ~df_coords['noc'].duplicated()
+        return df_coords.loc[mask].reset_index(drop=True)
     except FileNotFoundError:
         st.error(f"Archivo '{filepath}' no encontrado. Asegúrate de que esté en la ruta correcta.")
         return pd.DataFrame(columns=['noc', 'country', 'latitude', 'longitude'])
@@ -60,9 +86,146 @@ def load_noc_coords(filepath='noc_coordinates.csv'):
         st.error(f"Error al cargar o procesar '{filepath}': {e}")
         return pd.DataFrame(columns=['noc', 'country', 'latitude', 'longitude'])
 
+
+# --- Filtrado y Agregaciones Cacheadas ---
+
+def filter_olympics(df, years, game_type, genders):
+    """Aplica los filtros globales del sidebar (rango de años, tipo de juego, géneros) al DataFrame principal."""
+    # Las condiciones se combinan en una única máscara sobre arrays NumPy (los códigos de las
+    # columnas categóricas son vistas, no copias) y las filas se copian una sola vez con iloc
+    year_arr = df['year'].to_numpy()
+    mask = (year_arr >= years[0]) & (year_arr <= years[1])
+
+    if game_type != 'Todos' and 'type' in df.columns:
+        type_code = df['type'].cat.categories.get_loc(game_type)
+        mask &= df['type'].cat.codes.to_numpy() == type_code
+
+    if genders and 'gender' in df.columns:
+        gender_codes = df['gender'].cat.categories.get_indexer(list(genders))
+        mask &= np.isin(df['gender'].cat.codes.to_numpy(), gender_codes)
+    return df.iloc[np.flatnonzero(mask)]
+
+
+# Las agregaciones se cachean solo con los valores de los filtros: el DataFrame principal se pasa
+# como '_df' para que Streamlit no lo hashee (no cambia después de load_data). Así, mover el
+# slider de Top N o cambiar la ordenación no vuelve a ejecutar los groupby.
+@st.cache_data(show_spinner=False)
+def compute_participation(_df, years, game_type, genders):
+    """Número de participantes por año y género para los filtros dados."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    # value_counts cuenta los pares (año, género) sin pasar por el framework de agregación de groupby;
+    # px.area dibuja cada traza en el orden de las filas, así que se ordena por año (estable: mantiene el orden de género)
+    return (df_filtered[['year', 'gender']].value_counts(sort=False)
+            .rename('Count').reset_index()
+            .sort_values('year', kind='stable', ignore_index=True))
+
+
+@st.cache_data(show_spinner=False)
+def compute_disciplines_over_time(_df, years, game_type, genders):
+    """Número de disciplinas únicas por año para los filtros dados."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    return df_filtered.groupby('year', observed=True)['discipline'].nunique().reset_index()
+
+
+@st.cache_data(show_spinner=False)
+def load_noc_medal_counts(_df):
+    """Medallas Gold/Silver/Bronze por (año, tipo, género, NOC) del DataFrame principal."""
+    # Se calcula una sola vez (no hay más clave que _df, que no se hashea): ~9.000 filas frente a
+    # las ~300.000 del DataFrame principal. Las filas 'No Medal' se cuentan antes del reindex, así que
+    # aparece toda combinación con participantes aunque no tenga medallas.
+    return (_df.groupby(['year', 'type', 'gender', 'noc', 'medal'], observed=True).size()
+            .unstack('medal', fill_value=0)
+            .reindex(columns=['Gold', 'Silver', 'Bronze'], fill_value=0)
+            .rename_axis(columns=None)
+            .reset_index())
+
+
+@st.cache_data(show_spinner=False)
+def compute_metrics_by_noc(_df, years, game_type, genders):
+    """Atletas y medallas por NOC para los filtros dados."""
+    # Medallas: los mismos filtros sobre la tabla pre-agregada y una suma por NOC
+    # (asegúrate que estos strings coinciden con tus datos)
+    noc_medals = filter_olympics(load_noc_medal_counts(_df), years, game_type, genders)
+    medal_counts = noc_medals.groupby('noc', observed=True)[['Gold', 'Silver', 'Bronze']].sum()
+    # Atletas únicos: no se pueden sumar entre subgrupos (un atleta compite en varios años),
+    # así que se cuentan sobre las filas filtradas
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    metrics_by_noc = df_filtered.groupby('noc', observed=True).agg(
+        Total_Athletes=('name', 'nunique'),
+    )
+    # Total de medallas: las filas 'No Medal' (o NaN) quedan fuera del reindex anterior
+    metrics_by_noc['Total_Medals'] = medal_counts.sum(axis=1)
+    return metrics_by_noc.join(medal_counts).reset_index()
+
+
+@st.cache_data(show_spinner=False)
+def compute_age_by_discipline(_df, years, game_type, genders):
+    """Edad promedio de las 20 disciplinas con más atletas únicos para los filtros dados."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    # Atletas únicos y edad promedio en un solo groupby; después se queda con las 20 disciplinas con más atletas
+    return df_filtered.groupby('discipline', observed=True).agg(
+        athlete_count=('name', 'nunique'),
+        age=('age', 'mean')
+    ).nlargest(20, 'athlete_count').reset_index().sort_values('age', ascending=False)
+
+
+@st.cache_data(show_spinner=False)
+def compute_discipline_counts(_df, years, game_type, genders):
+    """Atletas únicos por (grupo de disciplina, disciplina) para los filtros dados."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    participation_counts = df_filtered.groupby(['discipline_grouped', 'discipline'], observed=True)['name'].nunique().reset_index(name='Athlete Count')
+    # px.treemap reagrupa las columnas del path: como strings no expande cada combinación
+    # de categorías (sin datos) en nodos vacíos
+    return participation_counts.astype({'discipline_grouped': str, 'discipline': str})
+
+
+@st.cache_data(show_spinner=False)
+def get_discipline_options(_df, years, game_type, genders, group=None):
+    """Grupos de disciplina (o, si se indica group, sus disciplinas) presentes con los filtros dados, ordenados."""
+    df_filtered = filter_olympics(_df, years, game_type, genders)
+    if group is None:
+        return sorted(df_filtered['discipline_grouped'].unique().tolist())
+    return sorted(df_filtered.loc[df_filtered['discipline_grouped'] == group, 'discipline'].unique().tolist())
+
+
+# --- Figuras Cacheadas ---
+# Las figuras que solo dependen de los filtros globales se construyen una vez por combinación de
+# filtros. st.cache_resource guarda el objeto Figure tal cual (sin copiarlo ni serializarlo);
+# st.plotly_chart no lo modifica.
+
+@st.cache_resource(show_spinner=False)
+def make_participation_fig(_df, years, game_type, genders):
+    """Gráfico de área de participantes por año y género."""
+    participation_over_time = compute_participation(_df, years, game_type, genders)
+    fig_participation = px.area(participation_over_time, x='year', y='Count', color='gender',
+                                labels={'year': 'Año', 'Count': 'Número de Participantes', 'gender': 'Género'},
+                                markers=True, template='plotly_white')
+    fig_participation.update_layout(hovermode="x unified")
+    return fig_participation
+
+
+@st.cache_resource(show_spinner=False)
+def make_disciplines_fig(_df, years, game_type, genders):
+    """Gráfico de líneas del número de disciplinas por año."""
+    disciplines_over_time = compute_disciplines_over_time(_df, years, game_type, genders)
+    return px.line(disciplines_over_time, x='year', y='discipline',
+                   title="Número de Disciplinas Olímpicas a lo largo del Tiempo",
+                   labels={'year': 'Año', 'discipline': 'Número de Disciplinas Únicas'},
+                   markers=True, template='plotly_white')
+
+
+@st.cache_resource(show_spinner=False)
+def make_age_by_discipline_fig(_df, years, game_type, genders):
+    """Gráfico de barras de la edad promedio de las 20 disciplinas con más atletas."""
+    age_by_discipline = compute_age_by_discipline(_df, years, game_type, genders)
+    return px.bar(age_by_discipline, x='discipline', y='age',
+                  title="Edad Promedio por Disciplina (Top 20 por Nº Atletas)",
+                  labels={'discipline': 'Disciplina', 'age': 'Edad Promedio'},
+                  template='plotly_white')
+
+
 # --- Cargar Datos ---
 df_olympics = load_data()
-df_coords = load_noc_coords()
 
 # --- Sidebar para Filtros Globales ---
 st.sidebar.header("Filtros Globales 🌍")
@@ -72,6 +235,8 @@ if df_olympics.empty:
     # Detener la ejecución si no hay datos
     st.stop()
 
+df_coords = load_noc_coords(noc_categories=tuple(df_olympics['noc'].cat.categories))
+
 # --- Filtros ---
 # Asegurar que 'year' es numérico antes de usar min/max
 if pd.api.types.is_numeric_dtype(df_olympics['year']):
@@ -89,7 +254,9 @@ else:
 
 # Filtro por tipo de juego (columna 'type')
 if 'type' in df_olympics.columns:
-    type_options = ['Todos'] + list(df_olympics['type'].unique())
+    # Las categorías de la columna ya son los valores presentes, ordenados y sin NaN (una categoría
+    # nunca es NaN): no hace falta recorrer la columna en cada ejecución
+    type_options = ['Todos'] + df_olympics['type'].cat.categories.tolist()
     selected_type = st.sidebar.radio(
         "Tipo de Juego",
         options=type_options,
@@ -101,9 +268,8 @@ else:
 
 # Filtro por género (columna 'gender')
 if 'gender' in df_olympics.columns:
-    gender_options = list(df_olympics['gender'].unique())
-    # Remover NaNs si existen en las opciones
-    gender_options = [g for g in gender_options if pd.notna(g)]
+    # Sin NaNs: las categorías nunca los incluyen
+    gender_options = df_olympics['gender'].cat.categories.tolist()
     selected_gender = st.sidebar.multiselect(
         "Selecciona Género",
         options=gender_options,
@@ -114,16 +280,10 @@ else:
     selected_gender = []
 
 # --- Filtrar el DataFrame Principal ---
-df_filtered = df_olympics[
-    (df_olympics['year'] >= selected_years[0]) &
-    (df_olympics['year'] <= selected_years[1])
-]
-
-if selected_type != 'Todos' and 'type' in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered['type'] == selected_type]
-
-if selected_gender and 'gender' in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered['gender'].isin(selected_gender)]
+# Valores de los filtros como tupla hashable (géneros ordenados: el orden de selección no
+# cambia el resultado), usada como clave de caché por las funciones compute_*
+filter_key = (tuple(selected_years), selected_type, tuple(sorted(selected_gender)))
+df_filtered = filter_olympics(df_olympics, *filter_key)
 
 # --- Verificar si quedan datos después de filtrar ---
 if df_filtered.empty and not df_olympics.empty :
@@ -162,11 +322,7 @@ with tab_overview:
 
     st.markdown("### Evolución de la Participación por Género")
     if 'year' in df_filtered.columns and 'gender' in df_filtered.columns:
-        participation_over_time = df_filtered.groupby(['year', 'gender']).size().reset_index(name='Count')
-        fig_participation = px.area(participation_over_time, x='year', y='Count', color='gender',
-                                    labels={'year': 'Año', 'Count': 'Número de Participantes', 'gender': 'Género'},
-                                    markers=True, template='plotly_white')
-        fig_participation.update_layout(hovermode="x unified")
+        fig_participation = make_participation_fig(df_olympics, *filter_key)
         st.plotly_chart(fig_participation, use_container_width=True)
     else:
         st.warning("Columnas 'year' o 'gender' no disponibles para gráfico de evolución.")
@@ -174,11 +330,7 @@ with tab_overview:
     st.markdown("### Número de Disciplinas por Año")
     if 'year' in df_filtered.columns and 'discipline' in df_filtered.columns:
         # Usar 'discipline' para contar disciplinas únicas
-        disciplines_over_time = df_filtered.groupby('year')['discipline'].nunique().reset_index()
-        fig_disciplines = px.line(disciplines_over_time, x='year', y='discipline',
-                                title="Número de Disciplinas Olímpicas a lo largo del Tiempo",
-                                labels={'year': 'Año', 'discipline': 'Número de Disciplinas Únicas'},
-                                markers=True, template='plotly_white')
+        fig_disciplines = make_disciplines_fig(df_olympics, *filter_key)
         st.plotly_chart(fig_disciplines, use_container_width=True)
     else:
         st.warning("Columnas 'year' o 'discipline' no disponibles para gráfico de disciplinas.")
@@ -189,20 +341,7 @@ with tab_geo:
     st.header("Rendimiento y Participación por País (NOC)")
 
     # Calcular métricas por NOC (usando 'noc', 'name', 'medal')
-    # Asegurar que 'medal' no contenga solo NaNs o valores inesperados
-    df_filtered['medal_present'] = df_filtered['medal'].notna() & (df_filtered['medal'] != 'No Medal') # Ajusta 'No Medal' si usaste otro valor
-
-    metrics_by_noc = df_filtered.groupby('noc').agg(
-        Total_Athletes=('name', 'nunique'),
-        Total_Medals=('medal_present', 'sum'), # Sumar True (1) donde hay medalla
-        # Contar medallas específicas (asegúrate que estos strings coinciden con tus datos)
-        Gold=('medal', lambda x: (x == 'Gold').sum()),
-        Silver=('medal', lambda x: (x == 'Silver').sum()),
-        Bronze=('medal', lambda x: (x == 'Bronze').sum())
-    ).reset_index()
-    # Convertir Total_Medals a int
-    metrics_by_noc['Total_Medals'] = metrics_by_noc['Total_Medals'].astype(int)
-
+    metrics_by_noc = compute_metrics_by_noc(df_olympics, *filter_key)
 
     # Añadir opción para ordenar países
     sort_options = ['Total_Medals', 'Total_Athletes', 'Gold', 'Silver', 'Bronze']
@@ -217,20 +356,27 @@ with tab_geo:
 
         # Gráfico de Barras Top Países
         st.markdown(f"### Top {top_n} Países por {sort_by.replace('_', ' ')}")
-        fig_top_countries = px.bar(top_countries, x='noc', y=sort_by,
-                                hover_data=['Total_Athletes', 'Gold', 'Silver', 'Bronze'],
-                                labels={'noc': 'País (NOC)', sort_by: sort_by.replace('_', ' ')},
-                                template='plotly_white',
-                                color=sort_by,
-                                color_continuous_scale=px.colors.sequential.Plasma)
+        # Traza construida directamente desde arrays NumPy, sin el preprocesado de Plotly Express
+        sort_label = sort_by.replace('_', ' ')
+        fig_top_countries = go.Figure(go.Bar(
+            x=top_countries['noc'].astype(str).to_numpy(),
+            y=top_countries[sort_by].to_numpy(),
+            marker=dict(color=top_countries[sort_by].to_numpy(),
+                        colorscale=px.colors.sequential.Plasma,
+                        colorbar=dict(title=sort_label)),
+            customdata=top_countries[['Total_Athletes', 'Gold', 'Silver', 'Bronze']].to_numpy(),
+            hovertemplate=(f"País (NOC)=%{{x}}<br>{sort_label}=%{{y}}<br>Total_Athletes=%{{customdata[0]}}"
+                           "<br>Gold=%{customdata[1]}<br>Silver=%{customdata[2]}<br>Bronze=%{customdata[3]}<extra></extra>")
+        ))
+        fig_top_countries.update_layout(template='plotly_white', xaxis_title='País (NOC)', yaxis_title=sort_label)
         st.plotly_chart(fig_top_countries, use_container_width=True)
 
     # Mapa de Puntos (Scatter Mapbox)
     st.markdown("### Distribución Geográfica de Medallas")
     if not df_coords.empty and 'noc' in metrics_by_noc.columns:
         # Unir métricas con coordenadas (usar 'noc')
-        df_map_data = pd.merge(metrics_by_noc[metrics_by_noc['Total_Medals'] > 0], df_coords, on='noc', how='left')
-        df_map_data.dropna(subset=['latitude', 'longitude'], inplace=True)
+        # Inner join: solo NOCs con medallas y coordenadas ('noc' comparte dtype categórico en los dos lados)
+        df_map_data = metrics_by_noc.loc[metrics_by_noc['Total_Medals'] > 0].merge(df_coords, on='noc', how='inner')
 
         if not df_map_data.empty:
             fig_scatter_map = px.scatter_mapbox(
@@ -280,16 +426,20 @@ with tab_athletes:
         color_discrete_map = {'Male': 'blue', 'Female': 'red', 'Mixed': 'green'} # Ajusta si tus valores de 'gender' son otros
 
         # Preparar datos para plot (eliminar NaNs en métrica y grupo si se usa)
-        plot_data = df_filtered.copy()
-        dropna_subset = [selected_metric]
-        if group_by_cat != 'Ninguno' and group_by_cat in plot_data.columns:
-            dropna_subset.append(group_by_cat)
-        plot_data.dropna(subset=dropna_subset, inplace=True)
+        # Solo se copian las columnas del gráfico, no todo df_filtered
+        plot_cols = [selected_metric]
+        if group_by_cat != 'Ninguno' and group_by_cat in df_filtered.columns:
+            plot_cols.append(group_by_cat)
+        plot_data = df_filtered[plot_cols].dropna()
 
 
         if not plot_data.empty:
             if group_by_cat != 'Ninguno':
-                fig_dist = px.violin(plot_data, y=selected_metric, color=group_by_cat,
+                # El violín envía todos los valores al navegador para estimar la densidad: con una
+                # muestra de 50.000 filas la forma se conserva. El histograma no se muestrea porque
+                # muestra recuentos absolutos.
+                violin_data = plot_data.sample(n=min(len(plot_data), 50000), random_state=0)
+                fig_dist = px.violin(violin_data, y=selected_metric, color=group_by_cat,
                                     box=True, points="outliers",
                                     labels={selected_metric: selected_metric.replace('_', ' ').title(), group_by_cat: group_by_cat.title()},
                                     title=f"Distribución de {selected_metric.replace('_', ' ').title()} por {group_by_cat.title()}",
@@ -319,21 +469,42 @@ with tab_athletes:
             scatter_dropna_subset = ['height_cm', 'weight_kg']
             if color_arg:
                 scatter_dropna_subset.append(color_arg)
-            scatter_data = df_filtered.dropna(subset=scatter_dropna_subset).copy()
+            # Solo las columnas que usa el gráfico (ejes, color y hover)
+            scatter_cols = ['height_cm', 'weight_kg', 'name', 'age', 'noc', 'discipline', 'medal']
+            if color_arg and color_arg not in scatter_cols:
+                scatter_cols.append(color_arg)
+            scatter_data = df_filtered[scatter_cols].dropna(subset=scatter_dropna_subset)
+            # Cada punto es un atleta: más allá de 5.000 puntos la nube no cambia de forma y solo
+            # encarece el envío y el dibujado, así que se muestrea
+            scatter_data = scatter_data.sample(n=min(len(scatter_data), 5000), random_state=0)
 
 
             if not scatter_data.empty:
-                fig_scatter_hw = px.scatter(scatter_data,
-                                            x='height_cm', y='weight_kg',
-                                            color=color_arg,
-                                            title="Relación Altura vs. Peso",
-                                            labels={'height_cm': 'Altura (cm)', 'weight_kg': 'Peso (kg)'},
-                                            hover_name='name', # Usar 'name' para hover
-                                            hover_data=['age', 'noc', 'discipline', 'medal'],
-                                            template='plotly_white',
-                                            color_discrete_map=color_discrete_map if color_arg == 'gender' else None,
-                                            opacity=0.6
-                                            )
+                # Una traza 'scattergl' por grupo de color, construida directamente desde arrays NumPy
+                # (sin el mapeo de colores y hover fila a fila de Plotly Express); 'scattergl' dibuja
+                # los puntos en la GPU, no como nodos SVG
+                fig_scatter_hw = go.Figure()
+                scatter_groups = scatter_data.groupby(color_arg, observed=True, sort=False) if color_arg else [(None, scatter_data)]
+                for group_value, group_data in scatter_groups:
+                    marker = dict(opacity=0.6)
+                    if color_arg == 'gender' and group_value in color_discrete_map:
+                        marker['color'] = color_discrete_map[group_value]
+                    fig_scatter_hw.add_trace(go.Scattergl(
+                        x=group_data['height_cm'].to_numpy(),
+                        y=group_data['weight_kg'].to_numpy(),
+                        mode='markers',
+                        name=str(group_value) if color_arg else '',
+                        showlegend=color_arg is not None,
+                        marker=marker,
+                        hovertext=group_data['name'].to_numpy(), # Usar 'name' para hover
+                        customdata=group_data[['age', 'noc', 'discipline', 'medal']].to_numpy(),
+                        hovertemplate=("<b>%{hovertext}</b><br><br>Altura (cm)=%{x}<br>Peso (kg)=%{y}"
+                                       "<br>age=%{customdata[0]}<br>noc=%{customdata[1]}"
+                                       "<br>discipline=%{customdata[2]}<br>medal=%{customdata[3]}<extra></extra>")
+                    ))
+                fig_scatter_hw.update_layout(title="Relación Altura vs. Peso", template='plotly_white',
+                                             xaxis_title='Altura (cm)', yaxis_title='Peso (kg)',
+                                             legend_title_text=color_arg)
                 st.plotly_chart(fig_scatter_hw, use_container_width=True)
             else:
                 st.warning("No hay datos válidos (altura, peso) para mostrar el gráfico de dispersión.")
@@ -352,29 +523,27 @@ with tab_disciplines:
             st.markdown("#### Filtros")
             # Seleccionar grupo de disciplina
             # Ordenar opciones alfabéticamente para mejor usabilidad
-            discipline_groups = ['Todos'] + sorted(list(df_filtered['discipline_grouped'].unique()))
+            discipline_groups = ['Todos'] + get_discipline_options(df_olympics, *filter_key)
             selected_group = st.selectbox("Filtrar por Grupo de Disciplina:", discipline_groups, key='disc_group')
 
-            df_disciplines_filtered = df_filtered.copy()
+            # Recuento cacheado con los filtros globales: los selectbox de esta pestaña solo seleccionan filas de la tabla
+            participation_counts = compute_discipline_counts(df_olympics, *filter_key)
             if selected_group != 'Todos':
-                df_disciplines_filtered = df_disciplines_filtered[df_disciplines_filtered['discipline_grouped'] == selected_group]
+                participation_counts = participation_counts[participation_counts['discipline_grouped'] == selected_group]
 
             # Seleccionar disciplina específica (si se ha filtrado grupo)
             if selected_group != 'Todos':
                 # Ordenar opciones alfabéticamente
-                specific_disciplines = ['Todas'] + sorted(list(df_disciplines_filtered['discipline'].unique()))
+                specific_disciplines = ['Todas'] + get_discipline_options(df_olympics, *filter_key, group=selected_group)
                 selected_specific_discipline = st.selectbox(f"Filtrar por Disciplina Específica (en {selected_group}):", specific_disciplines, key='disc_specific')
                 if selected_specific_discipline != 'Todas':
-                    df_disciplines_filtered = df_disciplines_filtered[df_disciplines_filtered['discipline'] == selected_specific_discipline]
+                    participation_counts = participation_counts[participation_counts['discipline'] == selected_specific_discipline]
 
 
         with col2:
             # Treemap de Participación por Disciplina Agrupada
             st.markdown("#### Distribución de Atletas por Disciplina")
-            if not df_disciplines_filtered.empty and 'name' in df_disciplines_filtered.columns:
-                # Contar atletas únicos ('name')
-                participation_counts = df_disciplines_filtered.groupby(['discipline_grouped', 'discipline'])['name'].nunique().reset_index(name='Athlete Count')
-
+            if not participation_counts.empty:
                 fig_treemap = px.treemap(participation_counts,
                                     path=[px.Constant("Todas las Disciplinas"), 'discipline_grouped', 'discipline'],
                                     values='Athlete Count',
@@ -394,16 +563,7 @@ with tab_disciplines:
         # Usar 'age' y 'discipline'
         if 'age' in df_filtered.columns and pd.api.types.is_numeric_dtype(df_filtered['age']) and 'discipline' in df_filtered.columns:
             # Calcular edad promedio por disciplina (Top N por número de atletas)
-            athletes_per_discipline = df_filtered.groupby('discipline')['name'].nunique().reset_index(name='athlete_count')
-            top_disciplines_by_athletes = athletes_per_discipline.nlargest(20, 'athlete_count')['discipline'].tolist()
-
-            # Filtrar el df principal para estas disciplinas y calcular edad promedio
-            age_by_discipline = df_filtered[df_filtered['discipline'].isin(top_disciplines_by_athletes)].groupby('discipline')['age'].mean().reset_index().sort_values('age', ascending=False)
-
-            fig_age_discipline = px.bar(age_by_discipline, x='discipline', y='age',
-                                    title="Edad Promedio por Disciplina (Top 20 por Nº Atletas)",
-                                    labels={'discipline': 'Disciplina', 'age': 'Edad Promedio'},
-                                    template='plotly_white')
+            fig_age_discipline = make_age_by_discipline_fig(df_olympics, *filter_key)
             st.plotly_chart(fig_age_discipline, use_container_width=True)
         else:
             st.warning("Columnas 'age' o 'discipline' no disponibles o no numéricas para comparación entre disciplinas.")
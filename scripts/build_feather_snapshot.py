@@ -0,0 +1,36 @@
+"""Genera jjoo.feather: jjoo.parquet con los tipos ya preparados para las apps.
+
+app.py y app_corregido.py cargan este fichero directamente. Feather conserva las columnas
+categóricas y los tipos numéricos reducidos, así que el arranque en frío no repite las conversiones.
+Ejecutar después de scripts/convert_to_parquet.py, desde la raíz del repositorio:
+
+    python scripts/build_feather_snapshot.py
+"""
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MAIN_COLUMNS = ['year', 'type', 'noc', 'medal', 'age', 'gender', 'discipline', 'discipline_grouped',
+                'name', 'height_cm', 'weight_kg', 'born_date']
+# Columnas de texto con pocos valores distintos: se guardan como 'category'
+CATEGORY_COLUMNS = ['noc', 'type', 'medal', 'gender', 'discipline', 'discipline_grouped']
+
+
+def load_main_data():
+    df = pd.read_parquet(ROOT / 'jjoo.parquet', columns=MAIN_COLUMNS, engine='pyarrow')
+    for c in CATEGORY_COLUMNS:
+        df[c] = df[c].astype('category')
+    # Tipos numéricos pequeños: year cabe en int16, age en int8 y altura/peso en float32
+    df['year'] = df['year'].astype('int16')
+    df['age'] = pd.to_numeric(df['age'], downcast='integer')
+    df['height_cm'] = df['height_cm'].astype('float32')
+    df['weight_kg'] = df['weight_kg'].astype('float32')
+    return df
+
+
+if __name__ == '__main__':
+    df = load_main_data()
+    df.reset_index(drop=True).to_feather(ROOT / 'jjoo.feather')
+    print(f"jjoo.parquet -> jjoo.feather ({len(df):,} filas)")
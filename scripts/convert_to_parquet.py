@@ -0,0 +1,23 @@
+"""Convierte los CSV de datos a Parquet (Snappy) para acelerar la carga de los dashboards.
+
+Ejecutar una vez desde la raíz del repositorio:
+
+    python scripts/convert_to_parquet.py
+"""
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def convert(csv_name, parquet_name, **read_kwargs):
+    df = pd.read_csv(ROOT / csv_name, **read_kwargs)
+    df.to_parquet(ROOT / parquet_name, compression='snappy', engine='pyarrow', index=False)
+    print(f"{csv_name} -> {parquet_name} ({len(df):,} filas)")
+
+
+if __name__ == '__main__':
+    convert('jjoo.csv', 'jjoo.parquet', parse_dates=['born_date'])
+    convert('geolocalizacion_completa.csv', 'geo.parquet')
+    convert('noc_coordinates.csv', 'noc_coords.parquet')